@@ -1,9 +1,11 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
+import numpy as np
 import pandas as pd
 from collections import defaultdict
-from itertools import combinations
+from itertools import combinations, chain
+from concurrent.futures import ThreadPoolExecutor
 import os
-import json
+import re
 from urllib.request import urlretrieve
 from pathlib import Path
 
@@ -14,6 +16,41 @@ REQUIRED_FILES = [
     "dataset_search_collection.jsonl",
 ]
 
+# Patterns for the lines of the corpus 'structured_info' text blob
+TASK_RE = re.compile(r"this dataset can be used to study the task of\s*(.*)", re.IGNORECASE)
+POPULARITY_RE = re.compile(r"having been used\s+(\d+)\s+times")
+
+def _filter_id_lists(columns: List[pd.Series], valid: set) -> List[list]:
+    """
+    Keeps only the IDs contained in `valid` in several columns of ID lists, using a single
+    vectorized membership test over all IDs. Returns, per column, the filtered list of every row.
+    """
+    rows = [lst if isinstance(lst, list) else [] for col in columns for lst in col.to_numpy()]
+    lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+    flat = np.fromiter(chain.from_iterable(rows), dtype=object, count=int(lengths.sum()))
+    mask = pd.Series(flat, dtype=object).isin(valid).to_numpy()
+
+    # Number of kept IDs per row, from the running count of kept IDs at each row boundary
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    kept_before = np.concatenate([[0], np.cumsum(mask)])
+    kept_counts = kept_before[offsets[1:]] - kept_before[offsets[:-1]]
+    filtered = [part.tolist() for part in np.split(flat[mask], np.cumsum(kept_counts)[:-1])]
+
+    result, start = [], 0
+    for col in columns:
+        result.append(filtered[start:start + len(col)])
+        start += len(col)
+    return result
+
+def _str_empty_to_na(df: pd.DataFrame) -> pd.DataFrame:
+    """Replaces empty strings with pd.NA, only scanning the string-typed columns."""
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        values = df[col]
+        mask = values.eq("")
+        if mask.any():
+            df[col] = values.mask(mask, pd.NA)
+    return df
+
 class DataFinder:
     """
     Usage:
@@ -24,6 +61,8 @@ class DataFinder:
 
     def __init__(self, cache_dir: Optional[str] = None) -> None:
         self.data = None
+        self._clean = None
+        self._corpus_id_set: Optional[set] = None
         self.cache_dir = cache_dir if cache_dir is not None else str(Path.home()) + "/.cache/darelabdb/datasets/"
         self.dataset_folder = os.path.join(self.cache_dir, "datafinder/")
 
@@ -34,25 +73,26 @@ class DataFinder:
         data_dir = os.path.join(self.dataset_folder, "data/")
         os.makedirs(data_dir, exist_ok=True)
 
-        # Download each required file if not already present
-        for filename in REQUIRED_FILES:
+        # Download each required file if not already present, fetching them concurrently
+        def fetch(filename: str) -> None:
             dest_path = os.path.join(data_dir, filename)
             if not os.path.exists(dest_path):
                 url = GITHUB_BASE_URL + filename
                 urlretrieve(url, dest_path)
 
-        # Load the files
-        with open(os.path.join(data_dir, "train_data.jsonl")) as f:
-            train = [json.loads(line) for line in f]
-        with open(os.path.join(data_dir, "test_data.jsonl")) as f:
-            test = [json.loads(line) for line in f]
-        with open(os.path.join(data_dir, "dataset_search_collection.jsonl")) as f:
-            corpus = [json.loads(line) for line in f]
+        with ThreadPoolExecutor(max_workers=len(REQUIRED_FILES)) as executor:
+            list(executor.map(fetch, REQUIRED_FILES))
+
+        # Load the files (parsed line by line by pandas, without an intermediate list of dicts)
+        def read_jsonl(filename: str) -> pd.DataFrame:
+            return pd.read_json(os.path.join(data_dir, filename), lines=True, dtype=False, convert_dates=False)
 
+        self._clean = None
+        self._corpus_id_set = None
         self.data = {
-            "train": pd.DataFrame(train).replace("", pd.NA),
-            "test": pd.DataFrame(test).replace("", pd.NA),
-            "corpus": pd.DataFrame(corpus).replace("", pd.NA),
+            "train": _str_empty_to_na(read_jsonl("train_data.jsonl")),
+            "test": _str_empty_to_na(read_jsonl("test_data.jsonl")),
+            "corpus": _str_empty_to_na(read_jsonl("dataset_search_collection.jsonl")),
         }
 
     def get_info(self) -> Dict[str, str]:
@@ -104,6 +144,8 @@ class DataFinder:
         Returns:
             Dict[str, pd.DataFrame]: Dictionary with "train", "test", and "corpus" keys.
         """
+        if self._clean is not None:
+            return self._clean
         if self.data is None:
             self._init_data()
         train = self.data["train"]
@@ -126,10 +168,13 @@ class DataFinder:
         corpus = self.data["corpus"]
         corpus_filtered = corpus[["id", "title", "contents", "year", "structured_info"]].copy()
         corpus_filtered = corpus_filtered.rename(columns={"contents": "description"})
-        structured_parts = corpus_filtered["structured_info"].apply(self._extract_structured_parts)
-        corpus_filtered = pd.concat([corpus_filtered.drop(columns=["structured_info"]), structured_parts], axis=1)
+        parts = [self._extract_structured_parts(info) for info in corpus_filtered["structured_info"].to_numpy()]
+        corpus_filtered = corpus_filtered.drop(columns=["structured_info"])
+        corpus_filtered["tasks"] = [p[0] for p in parts]
+        corpus_filtered["modalities"] = [p[1] for p in parts]
+        corpus_filtered["popularity"] = pd.array([p[2] for p in parts], dtype="Int64")
 
-        corpus_filtered = corpus_filtered.replace("", pd.NA)
+        corpus_filtered = _str_empty_to_na(corpus_filtered)
         corpus_filtered = corpus_filtered.dropna(subset=["description", "tasks"], how="any") # exclude datasets without description or tasks
 
         # Deduplicate: keep the oldest entry per ID
@@ -139,48 +184,47 @@ class DataFinder:
         # Build set of valid dataset IDs from corpus
         valid_ids = set(corpus_filtered["id"])
 
-        # Filter train positives and negatives to only include valid dataset IDs
-        train_filtered.loc[:, "positives"] = train_filtered["positives"].apply(lambda lst: [d for d in lst if d in valid_ids])
-        train_filtered.loc[:, "negatives"] = train_filtered["negatives"].apply(lambda lst: [d for d in lst if d in valid_ids])
-
-        # Filter test positives to only include valid dataset IDs
-        test_filtered["positives"] = test_filtered["positives"].apply(lambda lst: [d for d in lst if d in valid_ids])
+        # Filter train positives/negatives and test positives to only include valid dataset IDs
+        train_positives, train_negatives, test_positives = _filter_id_lists(
+            [train_filtered["positives"], train_filtered["negatives"], test_filtered["positives"]], valid_ids
+        )
+        train_filtered = train_filtered.assign(positives=train_positives, negatives=train_negatives)
+        test_filtered = test_filtered.assign(positives=test_positives)
 
         # Exclude train and test rows with no remaining positives
         train_filtered = train_filtered[train_filtered["positives"].apply(lambda x: len(x) > 0)]
         test_filtered = test_filtered[test_filtered["positives"].apply(lambda x: len(x) > 0)]
 
-        return {
-            "train": pd.DataFrame(train_filtered),
-            "test": pd.DataFrame(test_filtered),
-            "corpus": pd.DataFrame(corpus_filtered),
+        self._clean = {
+            "train": train_filtered.reset_index(drop=True),
+            "test": test_filtered.reset_index(drop=True),
+            "corpus": corpus_filtered,
         }
+        return self._clean
 
-    def _extract_structured_parts(self, info: str) -> pd.Series:
+    def _extract_structured_parts(self, info: str) -> Tuple:
         """
         Extracts tasks, modalities, and popularity from the 'structured_info' text blob.
 
         Returns:
-            pd.Series: A Series with columns ['tasks', 'modalities', 'popularity'].
+            Tuple: (tasks, modalities, popularity), i.e. a list of task names, a modalities string
+            and a usage count, each pd.NA when not found.
         """
         tasks = modalities = popularity = pd.NA
 
-        task_prefix = "this dataset can be used to study the task of"
-        for line in info.split("\n"):
+        for line in info.splitlines():
             line = line.strip().rstrip(".")
 
-            if line.lower().startswith(task_prefix):
-                raw_task_string = line[len(task_prefix):].strip()
-                tasks = [t.strip() for t in raw_task_string.replace(" and ", ",").split(",") if t.strip()]
+            if (task_match := TASK_RE.match(line)) is not None:
+                tasks = [t.strip() for t in task_match.group(1).replace(" and ", ",").split(",") if t.strip()]
             elif "having been used" in line and "times" in line:
-                try:
-                    popularity = int(line.split("having been used")[1].split("times")[0].strip())
-                except Exception:
-                    pass
+                # Usage lines are never taken as modalities, even when the count does not parse
+                if (popularity_match := POPULARITY_RE.search(line)) is not None:
+                    popularity = int(popularity_match.group(1))
             elif modalities is pd.NA:
                 modalities = line
 
-        return pd.Series([tasks, modalities, popularity], index=["tasks", "modalities", "popularity"])
+        return tasks, modalities, popularity
 
     def get_raw(self) -> Dict[str, pd.DataFrame]:
         """
@@ -219,21 +263,18 @@ class DataFinder:
         Each dataset ID maps to a set of related dataset IDs.
         Relationships are symmetric: if d1 is related to d2, then d2 is also related to d1.
         """
-        if self.data is None:
-            self._init_data()
-
-        data = self.get()
+        data = self.get()  # memoized after the first call
         splits = [data["train"], data["test"]]
 
         related = defaultdict(set)
 
         for split in splits:
-            for _, row in split.iterrows():
-                positives = set(row.get("positives", []))
-                if len(positives) > 1:
-                    for d1, d2 in combinations(positives, 2):
-                        related[d1].add(d2)
-                        related[d2].add(d1)
+            for positives in split["positives"].to_numpy():
+                if not isinstance(positives, list) or len(positives) < 2:
+                    continue
+                for d1, d2 in combinations(set(positives), 2):
+                    related[d1].add(d2)
+                    related[d2].add(d1)
 
         return dict(related)
 
@@ -244,23 +285,23 @@ class DataFinder:
         Each dataset ID maps to a set of related dataset IDs.
         Relationships are symmetric: if d1 and d2 share a task, both will reference each other.
         """
-        if self.data is None:
-            self._init_data()
-
-        data = self.get()
+        data = self.get()  # memoized after the first call
         corpus = data["corpus"]
 
-        related = defaultdict(set)
-
-        for _, row in corpus.iterrows():
-            dataset_id = row["id"]
-            tasks = row["tasks"]
+        # Invert the corpus into task -> dataset IDs, then link every pair within each bucket
+        task_to_ids = defaultdict(list)
+        for dataset_id, tasks in zip(corpus["id"].to_numpy(), corpus["tasks"].to_numpy()):
+            if not isinstance(tasks, list):
+                continue
             for task in set(tasks):  # eliminate duplicate tasks
-                co_datasets = corpus[corpus["tasks"].apply(lambda t: task in t if isinstance(t, list) else False)]["id"]
-                for other_id in co_datasets:
-                    if other_id != dataset_id:
-                        related[dataset_id].add(other_id)
-                        related[other_id].add(dataset_id)
+                task_to_ids[task].append(dataset_id)
+
+        related = defaultdict(set)
+        for dataset_ids in task_to_ids.values():
+            for d1, d2 in combinations(dataset_ids, 2):
+                if d1 != d2:
+                    related[d1].add(d2)
+                    related[d2].add(d1)
 
         return dict(related)
     
@@ -276,4 +317,6 @@ class DataFinder:
         """
         if self.data is None:
             self._init_data()
-        return dataset_id in set(self.data["corpus"]["id"])
\ No newline at end of file
+        if self._corpus_id_set is None:
+            self._corpus_id_set = set(self.data["corpus"]["id"].to_numpy().tolist())
+        return dataset_id in self._corpus_id_set
\ No newline at end of file
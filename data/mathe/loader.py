@@ -1,6 +1,7 @@
 from typing import List, Dict, Optional
 from pathlib import Path
 import json
+import os
 
 import pandas as pd
 from huggingface_hub import snapshot_download
@@ -78,8 +79,11 @@ class MathE:
         if self.data is None:
             self._init_data()
         df = pd.DataFrame(self.data)
-        df["material_id"] = df["id"].apply(lambda p: Path(p).name)
-        df["pdf_path"] = df["id"].apply(lambda p: str(self._base_dir / p))
+        # Plain string path operations avoid building a Path object per row
+        ids = df["id"].tolist()
+        base_dir = str(self._base_dir)
+        df["material_id"] = [os.path.basename(p) for p in ids]
+        df["pdf_path"] = [os.path.normpath(os.path.join(base_dir, p)) for p in ids]
         df = df.replace("", pd.NA)
         return df
 
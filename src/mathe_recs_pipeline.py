@@ -6,6 +6,11 @@ from pathlib import Path
 import numpy as np
 import torch
 
+try:
+    import faiss
+except ImportError:  # optional: fall back to an exact NumPy search
+    faiss = None
+
 from transformers import AutoTokenizer
 from sentence_transformers import SentenceTransformer
 from chonky import ParagraphSplitter
@@ -20,10 +25,9 @@ def compute_token_stats(data, tokenizer):
     Prints summary statistics and returns the IDs of materials whose tokenized
     length exceeds the model's maximum token length.
     """
-    lengths = []
-    for d in data:
-        n_tokens = len(tokenizer(d["contents"], truncation=False)["input_ids"])
-        lengths.append(n_tokens)
+    # One batched call lets the fast (Rust) tokenizer process the corpus in parallel
+    encoded = tokenizer([d["contents"] for d in data], padding=False, truncation=False, return_length=True)
+    lengths = encoded["length"]
 
     print(f"\nToken length stats:")
     print(f"  Avg: {np.mean(lengths):.1f}")
@@ -37,6 +41,52 @@ def compute_token_stats(data, tokenizer):
     print(f"\n{len(over_limit_ids)} materials exceed {max_length} tokens.")
     return over_limit_ids
 
+def top_n_similar(normed_embs, n, device="cpu", block_size=4096):
+    """
+    Returns, for every row of the L2-normalized embedding matrix (NumPy array or torch tensor),
+    the indices of its n most similar rows by cosine similarity (excluding the row itself), best first.
+    On CUDA, similarities are computed in float16 block by block and reduced with torch.topk.
+    On CPU, uses an exact inner-product FAISS index, so the full similarity matrix is never built.
+    Without FAISS, similarities are computed with NumPy one block of rows at a time
+    and only the top n of each row are sorted.
+    """
+    if str(device).startswith("cuda"):
+        embs = torch.as_tensor(normed_embs).to(device=device, dtype=torch.float16)
+        k = min(n, embs.shape[0] - 1)
+        top = []
+        for start in range(0, embs.shape[0], block_size):
+            sims = embs[start:start + block_size] @ embs.T
+            rows = torch.arange(sims.shape[0], device=device)
+            sims[rows, rows + start] = -torch.inf  # never recommend an item to itself
+            top.append(sims.topk(k, dim=1).indices.cpu())
+        return torch.cat(top).tolist()
+
+    if isinstance(normed_embs, torch.Tensor):
+        normed_embs = normed_embs.cpu().numpy()
+    normed_embs = np.ascontiguousarray(normed_embs, dtype=np.float32)
+    if faiss is None:
+        num_rows = normed_embs.shape[0]
+        k = min(n, num_rows - 1)
+        if k <= 0:
+            return [[] for _ in range(num_rows)]
+        top = []
+        for start in range(0, num_rows, block_size):
+            sims = normed_embs[start:start + block_size] @ normed_embs.T
+            rows = np.arange(sims.shape[0])
+            sims[rows, rows + start] = -np.inf  # never recommend an item to itself
+            part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            order = np.argsort(-sims[rows[:, None], part], axis=1)
+            top.extend(part[rows[:, None], order].tolist())
+        return top
+
+    index = faiss.IndexFlatIP(normed_embs.shape[1])
+    index.add(normed_embs)
+    _, neighbors = index.search(normed_embs, n + 1)
+    return [
+        [int(j) for j in row if j != i and j >= 0][:n]
+        for i, row in enumerate(neighbors)
+    ]
+
 if __name__ == "__main__":
     mathe = MathE()
     data = mathe.get_raw()
@@ -54,33 +104,56 @@ if __name__ == "__main__":
 
     model = SentenceTransformer("BAAI/bge-m3").to(device)
     print("\nStarting embedding computation for all materials...")
-    embeddings = {}
-    max_length = getattr(tokenizer.model_max_length, "real", tokenizer.model_max_length)
     splitter = ParagraphSplitter(device=device)
-    for idx, d in enumerate(data, 1):
+
+    # Collect texts first so that encoding runs in padded batches rather than one call per text
+    over_limit_ids = set(over_limit_ids)
+    material_ids = []
+    direct_texts, direct_ids = [], []
+    chunk_texts, chunk_owner, chunked_ids = [], [], []
+    for d in data:
         material_id = Path(d["id"]).name
+        material_ids.append(material_id)
         text = d["contents"]
         if d["id"] not in over_limit_ids:
-            emb = model.encode(text)
-            embeddings[material_id] = emb
-            print(f"Embedded material {idx}/{len(data)} (ID: {material_id}) directly.")
+            direct_texts.append(text)
+            direct_ids.append(material_id)
         else:
             print(f"Over token limit → chunking {material_id} semantically...")
             chunks = list(splitter(text))
-            chunk_embs = [model.encode(chunk) for chunk in chunks]
-            emb = np.mean(chunk_embs, axis=0)
-            embeddings[material_id] = emb
-            print(f"  Averaged embeddings from {len(chunks)} chunks.")
+            chunk_texts.extend(chunks)
+            chunk_owner.extend([len(chunked_ids)] * len(chunks))
+            chunked_ids.append(material_id)
+            print(f"  Split into {len(chunks)} chunks.")
+
+    # Embeddings stay on the device as tensors until they are saved and ranked
+    encode_kwargs = dict(batch_size=32, convert_to_tensor=True, normalize_embeddings=True, show_progress_bar=True)
+    computed = {}
+    with torch.inference_mode():
+        if direct_texts:
+            direct_embs = model.encode(direct_texts, **encode_kwargs)
+            computed.update(zip(direct_ids, direct_embs))
+            print(f"Embedded {len(direct_texts)} materials directly.")
+        if chunk_texts:
+            chunk_embs = model.encode(chunk_texts, **encode_kwargs)
+            # Sum the chunk embeddings per material; normalizing the sum equals normalizing the mean
+            owners = torch.as_tensor(chunk_owner, device=chunk_embs.device)
+            chunk_sums = torch.zeros(
+                len(chunked_ids), chunk_embs.shape[1], dtype=chunk_embs.dtype, device=chunk_embs.device
+            ).index_add_(0, owners, chunk_embs)
+            computed.update(zip(chunked_ids, torch.nn.functional.normalize(chunk_sums, dim=1)))
+            print(f"Averaged chunk embeddings for {len(chunked_ids)} materials.")
+        # Rows are already unit-norm (normalize_embeddings=True); keep them in float32
+        embeddings = torch.stack([computed[mid] for mid in material_ids]).float()
 
     print("\nEmbedding computation completed.")
-    print(f"Total materials embedded: {len(embeddings)}")
+    print(f"Total materials embedded: {len(material_ids)}")
 
     mathe_path = Path("data/mathe")
     mathe_path.mkdir(parents=True, exist_ok=True)
 
     # Convert embeddings to numpy array and save
-    material_ids = list(embeddings.keys())
-    embeddings_array = np.stack([embeddings[mid] for mid in material_ids])
+    embeddings_array = embeddings.cpu().numpy()
     np.save(mathe_path / "mathe_embeddings.npy", embeddings_array)
 
     # Create index mapping and save
@@ -91,26 +164,18 @@ if __name__ == "__main__":
     print(f"Saved embeddings to mathe_embeddings.npy with shape {embeddings_array.shape}")
     print(f"Saved index mapping to mathe_embedding_index.json")
 
-    # Step 2: Generate top-n recommendations
+    # Step 2: Generate top-n recommendations from the in-memory embeddings
 
     n = 20  # n for top-n recommendations
-    mathe_path = Path("data/mathe")
-    loaded_embeddings = np.load(mathe_path / "mathe_embeddings.npy")
-    with open(mathe_path / "mathe_embedding_index.json", "r", encoding="utf-8") as f:
-        loaded_index_mapping = json.load(f)
-        
-    # Invert the mapping to get index -> material_id
-    idx_to_material_id = {int(k): v for k, v in loaded_index_mapping.items()}
-    num_materials = loaded_embeddings.shape[0]
-
-    # Normalize embeddings for cosine similarity
-    normed_embs = loaded_embeddings / np.linalg.norm(loaded_embeddings, axis=1, keepdims=True)
-    sim_matrix = np.dot(normed_embs, normed_embs.T)
+    idx_to_material_id = dict(enumerate(material_ids))
+    num_materials = len(material_ids)
+
+    # Embeddings are already L2-normalized, so inner products are cosine similarities
+    with torch.inference_mode():
+        neighbors = top_n_similar(embeddings, n, device=device)
 
     topn_recommendations = {
-        idx_to_material_id[i]: [
-            idx_to_material_id[j] for j in np.argsort(sim_matrix[i])[::-1] if j != i
-        ][:n]
+        idx_to_material_id[i]: [idx_to_material_id[j] for j in neighbors[i]]
         for i in range(num_materials)
     }
 
@@ -1,10 +1,10 @@
-import json
+import orjson
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 def extract_format_and_fields(json_path: Path) -> dict:
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = orjson.loads(json_path.read_bytes())
 
     # 1. Get encoding format(s) from distribution
     encoding_formats = set()
@@ -32,38 +32,48 @@ def extract_format_and_fields(json_path: Path) -> dict:
         "fields": field_names
     }
 
+def _scan_encoding_formats(json_path: Path) -> tuple:
+    """
+    Returns (file name, encoding formats, error message) for one metadata file.
+    Runs in a worker process, so failures are reported back instead of printed.
+    """
+    try:
+        data = orjson.loads(json_path.read_bytes())
+
+        encoding_formats = set()
+        distributions = data.get("distribution", [])
+        if isinstance(distributions, list):
+            for dist in distributions:
+                fmt = dist.get("encodingFormat")
+                if fmt:
+                    encoding_formats.add(fmt.strip().lower())
+
+        if not encoding_formats and "encodingFormat" in data:
+            encoding_formats.add(data["encodingFormat"].strip().lower())
+
+        if not encoding_formats:
+            encoding_formats.add("unknown")
+
+        return json_path.name, sorted(encoding_formats), None
+
+    except Exception as e:
+        return json_path.name, [], str(e)
+
 def extract_formats_and_files(folder_path: str) -> dict:
     """
     Scans all JSON metadata files in a folder and returns a mapping of
     encoding formats to list of dataset JSON filenames.
+    Files are parsed in parallel worker processes.
     """
     folder = Path(folder_path)
     format_to_files = defaultdict(list)
 
-    for file in folder.glob("*.json"):
-        try:
-            with open(file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            encoding_formats = set()
-            distributions = data.get("distribution", [])
-            if isinstance(distributions, list):
-                for dist in distributions:
-                    fmt = dist.get("encodingFormat")
-                    if fmt:
-                        encoding_formats.add(fmt.strip().lower())
-
-            if not encoding_formats and "encodingFormat" in data:
-                encoding_formats.add(data["encodingFormat"].strip().lower())
-
-            if not encoding_formats:
-                encoding_formats.add("unknown")
-
+    with ProcessPoolExecutor() as executor:
+        for name, encoding_formats, error in executor.map(_scan_encoding_formats, folder.glob("*.json"), chunksize=32):
+            if error is not None:
+                print(f"Failed to process {name}: {error}")
             for fmt in encoding_formats:
-                format_to_files[fmt].append(file.name)
-
-        except Exception as e:
-            print(f"Failed to process {file.name}: {e}")
+                format_to_files[fmt].append(name)
 
     print("Dataset Encoding Formats Summary")
     for fmt, files in sorted(format_to_files.items()):
@@ -83,10 +93,13 @@ def check_datasets_without_recordset(folder_path: str) -> list:
 
     for file in folder.glob("*.json"):
         try:
-            with open(file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            raw = file.read_bytes()
+            # Only parse files that mention the key, to tell a missing recordSet from an empty one
+            if b'"recordSet"' not in raw:
+                missing_recordset.append(file.name)
+                continue
 
-            record_set = data.get("recordSet")
+            record_set = orjson.loads(raw).get("recordSet")
             if not record_set:
                 missing_recordset.append(file.name)
 
@@ -103,7 +116,7 @@ if __name__ == "__main__":
     
     # # Examples:
     # result = extract_format_and_fields(Path("data/gems_datasets_metadata/mathe_material.json"))
-    # print(json.dumps(result, indent=2))
+    # print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
 
     # formats_map = extract_formats_and_files(
     #     "data/gems_datasets_metadata/"
@@ -1,12 +1,21 @@
-import json
+import logging
 import os
-from typing import List, Set, Optional
+from functools import lru_cache
+from itertools import chain
+from typing import List, Set, Optional, Tuple
+import ijson
 import redis
+import redis.asyncio
 import os
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 def load_repo_env():
     """Walk up directories until .env is found and load it."""
+    # Deployments that already export REDIS_URL have nothing to load
+    if os.getenv("REDIS_URL"):
+        return
     current_dir = os.path.abspath(os.path.dirname(__file__))
     while True:
         env_path = os.path.join(current_dir, ".env")
@@ -15,7 +24,8 @@ def load_repo_env():
             break
         parent_dir = os.path.dirname(current_dir)
         if parent_dir == current_dir:
-            raise FileNotFoundError(".env file not found in any parent directory.")
+            logger.warning(".env file not found in any parent directory.")
+            break
         current_dir = parent_dir
 
 # Load .env once when the module is imported
@@ -23,16 +33,35 @@ load_repo_env()
 
 REDIS_URL = os.getenv("REDIS_URL")
 
+# Set holding the names of all ingested usecases
+USECASES_KEY = "recommendations_usecases"
+# Number of PDFs whose writes are sent per pipeline round-trip
+PIPELINE_BATCH_SIZE = 1000
+# Upper bound on the connections shared by all clients in this process
+REDIS_MAX_CONNECTIONS = 64
+
+@lru_cache(maxsize=None)
+def get_connection_pool() -> redis.ConnectionPool:
+    """Return the process-wide Redis connection pool, creating it on first use."""
+    return redis.ConnectionPool.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, decode_responses=True)
+
 class RecommendationClient:
     """
-    Client for ingesting and querying PDF recommendation mappings using Redis Sets.
+    Client for ingesting and querying PDF recommendation mappings using Redis sorted sets and sets.
+
+    Redis key patterns:
+        recommendations:<usecase>:<pdf_name>        PDFs recommended for <pdf_name>, as a
+                                                    sorted set scored by their rank
+        recommendations_rev:<usecase>:<pdf_name>    PDFs that recommend <pdf_name>
+        recommendations_meta:<usecase>              all PDFs ingested for <usecase>
+        recommendations_usecases                    names of all ingested usecases
 
-    Redis key pattern:
-        recommendations:<usecase>:<pdf_name>
+    Data written by older versions of this client (recommendations as plain sets, no
+    meta/usecase index) is not readable: re-ingest the source JSON files.
     """
 
     def __init__(self):
-        self.r = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+        self.r = redis.Redis(connection_pool=get_connection_pool())
 
     # -------------------------
     # INGESTION
@@ -50,49 +79,95 @@ class RecommendationClient:
         if usecase is None:
             usecase = os.path.basename(json_path).split(".")[0]
 
-        with open(json_path, "r") as f:
-            data = json.load(f)
-
-        if not isinstance(data, dict):
-            raise ValueError("JSON must contain a dictionary at its top level.")
-
+        # Buffer PDFs and write them every PIPELINE_BATCH_SIZE (a repeated key keeps its last value)
+        batch = {}
         count = 0
-        for pdf, recs in data.items():
-            if not isinstance(recs, list):
-                raise ValueError(f"Value for '{pdf}' must be a list.")
+        with open(json_path, "rb") as f:
+            # Stream (pdf, recs) pairs instead of loading the whole file
+            events = ijson.parse(f)
+            first_event = next(events, None)
+            if first_event is None or first_event[1] != "start_map":
+                raise ValueError("JSON must contain a dictionary at its top level.")
 
-            key = self._key(usecase, pdf)
+            for pdf, recs in ijson.kvitems(chain([first_event], events), ""):
+                if not isinstance(recs, list):
+                    raise ValueError(f"Value for '{pdf}' must be a list.")
 
-            if recs:
-                self.r.sadd(key, *recs)
-            else:
-                # ensure empty sets exist
-                self.r.sadd(key, "")
+                batch[pdf] = recs
+                count += 1
+                if len(batch) == PIPELINE_BATCH_SIZE:
+                    self._write_batch(usecase, batch)
+                    batch = {}
 
-            count += 1
+        self._write_batch(usecase, batch)
 
         return f"Ingested {count} PDFs into usecase '{usecase}'."
 
+    def _write_batch(self, usecase: str, batch: dict):
+        """
+        Replace the stored recommendations of every PDF in `batch` (pdf -> recs),
+        keeping the reverse index in sync, in two pipelined round-trips.
+        """
+        # Read the current recommendations first: the PDF must leave their reverse sets
+        read = self.r.pipeline(transaction=False)
+        for pdf in batch:
+            read.zrange(self._key(usecase, pdf), 0, -1)
+        old_recs = read.execute()
+
+        pipe = self.r.pipeline(transaction=False)
+        pipe.sadd(USECASES_KEY, usecase)
+        for (pdf, recs), old in zip(batch.items(), old_recs):
+            # PDFs without recommendations are only recorded in the meta set
+            pipe.sadd(self._meta_key(usecase), pdf)
+            key = self._key(usecase, pdf)
+            for rec in old:
+                pipe.srem(self._rev_key(usecase, rec), pdf)
+            # Replace rather than merge, so re-ingesting a file resets the ranking
+            pipe.delete(key)
+            if recs:
+                # A PDF listed twice keeps its first (best) rank
+                pipe.zadd(key, {rec: rank for rank, rec in enumerate(dict.fromkeys(recs))})
+                for rec in recs:
+                    pipe.sadd(self._rev_key(usecase, rec), pdf)
+        pipe.execute()
+
     # -------------------------
     # QUERYING
     # -------------------------
-    def get_recommendations(self, usecase: str, pdf: str) -> Set[str]:
-        """Return all recommended PDFs for the given input PDF."""
-        key = self._key(usecase, pdf)
-        recs = self.r.smembers(key)
-        return {r for r in recs if r != ""}  # filter placeholder
+    def get_recommendations(self, usecase: str, pdf: str) -> List[str]:
+        """Return all recommended PDFs for the given input PDF, best first."""
+        return self.r.zrange(self._key(usecase, pdf), 0, -1)
+
+    def get_top_n(self, usecase: str, pdf: str, n: int) -> List[str]:
+        """Return the n best recommended PDFs; only those n cross the wire."""
+        if n <= 0:
+            return []
+        return self.r.zrange(self._key(usecase, pdf), 0, n - 1)
+
+    def lookup_top_n(self, usecase: str, pdf: str, n: int) -> Tuple[bool, List[str]]:
+        """
+        Return (usecase exists, n best recommendations for pdf) in one round-trip,
+        so callers can tell an unknown usecase from a PDF without recommendations.
+        """
+        if n <= 0:
+            return self.has_usecase(usecase), []
+        pipe = self.r.pipeline(transaction=False)
+        pipe.sismember(USECASES_KEY, usecase)
+        pipe.zrange(self._key(usecase, pdf), 0, n - 1)
+        exists, recs = pipe.execute()
+        return bool(exists), recs
 
     def list_pdfs(self, usecase: str) -> List[str]:
         """List all PDFs in a given usecase."""
-        pattern = f"recommendations:{usecase}:*"
-        keys = self.r.keys(pattern)
-        return [key.split(":", 2)[-1] for key in keys]
+        return list(self.r.smembers(self._meta_key(usecase)))
 
     def list_usecases(self) -> List[str]:
         """List all available usecases."""
-        keys = self.r.keys("recommendations:*")
-        usecases = {key.split(":")[1] for key in keys}
-        return sorted(usecases)
+        return sorted(self.r.smembers(USECASES_KEY))
+
+    def has_usecase(self, usecase: str) -> bool:
+        """Check whether a usecase has been ingested, with a single SISMEMBER."""
+        return bool(self.r.sismember(USECASES_KEY, usecase))
 
     def find_entries_recommending(self, usecase: str, pdf: str) -> Set[str]:
         """
@@ -107,20 +182,10 @@ class RecommendationClient:
                 find_entries_recommending("taxguides", "7.pdf")
             returns:
                 {"6.pdf", "22.pdf"}
-        """
-        pattern = f"recommendations:{usecase}:*"
-        keys = self.r.keys(pattern)
-
-        referring_pdfs = set()
 
-        for key in keys:
-            source_pdf = key.split(":", 2)[-1]
-            recs = self.r.smembers(key)
-
-            if pdf in recs:
-                referring_pdfs.add(source_pdf)
-
-        return referring_pdfs
+        Served from the reverse index written by `ingest_json`, in a single lookup.
+        """
+        return self.r.smembers(self._rev_key(usecase, pdf))
     
 
     # -------------------------
@@ -129,3 +194,64 @@ class RecommendationClient:
     @staticmethod
     def _key(usecase: str, pdf: str) -> str:
         return f"recommendations:{usecase}:{pdf}"
+
+    @staticmethod
+    def _rev_key(usecase: str, pdf: str) -> str:
+        return f"recommendations_rev:{usecase}:{pdf}"
+
+    @staticmethod
+    def _meta_key(usecase: str) -> str:
+        return f"recommendations_meta:{usecase}"
+
+
+class AsyncRecommendationClient:
+    """
+    Non-blocking, query-only counterpart of RecommendationClient for asyncio code
+    (e.g. FastAPI handlers), built on redis.asyncio. Uses the same Redis key patterns.
+    """
+
+    def __init__(self):
+        # asyncio connections are bound to an event loop, so each client owns its pool
+        self.r = redis.asyncio.Redis.from_url(
+            REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, decode_responses=True
+        )
+
+    async def check_connection(self) -> bool:
+        """Return True if the Redis server answers a PING."""
+        return await self.r.ping()
+
+    async def get_recommendations(self, usecase: str, pdf: str) -> List[str]:
+        """Return all recommended PDFs for the given input PDF, best first."""
+        return await self.r.zrange(RecommendationClient._key(usecase, pdf), 0, -1)
+
+    async def get_top_n(self, usecase: str, pdf: str, n: int) -> List[str]:
+        """Return the n best recommended PDFs; only those n cross the wire."""
+        if n <= 0:
+            return []
+        return await self.r.zrange(RecommendationClient._key(usecase, pdf), 0, n - 1)
+
+    async def lookup_top_n(self, usecase: str, pdf: str, n: int) -> Tuple[bool, List[str]]:
+        """Return (usecase exists, n best recommendations for pdf) in one round-trip."""
+        if n <= 0:
+            return await self.has_usecase(usecase), []
+        async with self.r.pipeline(transaction=False) as pipe:
+            pipe.sismember(USECASES_KEY, usecase)
+            pipe.zrange(RecommendationClient._key(usecase, pdf), 0, n - 1)
+            exists, recs = await pipe.execute()
+        return bool(exists), recs
+
+    async def list_usecases(self) -> List[str]:
+        """List all available usecases."""
+        return sorted(await self.r.smembers(USECASES_KEY))
+
+    async def has_usecase(self, usecase: str) -> bool:
+        """Check whether a usecase has been ingested, with a single SISMEMBER."""
+        return bool(await self.r.sismember(USECASES_KEY, usecase))
+
+    async def find_entries_recommending(self, usecase: str, pdf: str) -> Set[str]:
+        """Return a set of all PDFs that list `pdf` as a recommendation."""
+        return await self.r.smembers(RecommendationClient._rev_key(usecase, pdf))
+
+    async def aclose(self) -> None:
+        """Close the client's connections."""
+        await self.r.aclose()
@@ -1,4 +1,4 @@
 
-from .item_item import recall_at_n, tndcg_at_n
+from .item_item import recall_at_n, tndcg_at_n, encode, recall_at_n_encoded, tndcg_at_n_encoded
 
-__all__ = ["recall_at_n", "tndcg_at_n"]
\ No newline at end of file
+__all__ = ["recall_at_n", "tndcg_at_n", "encode", "recall_at_n_encoded", "tndcg_at_n_encoded"]
\ No newline at end of file
@@ -1,3 +1,5 @@
+from itertools import chain
+
 import numpy as np
 
 def recall_at_n(predictions: dict, ground_truth: dict, n=10):
@@ -12,7 +14,7 @@ def recall_at_n(predictions: dict, ground_truth: dict, n=10):
     predictions : dict
         A dictionary mapping item IDs to an ordered list of predicted related item IDs.
     ground_truth : dict
-        A dictionary mapping item IDs to a set of true related item IDs.
+        A dictionary mapping item IDs to a set (or any iterable) of true related item IDs.
     n : int, optional
         The number of top predictions to consider for each item (default is 10).
 
@@ -26,15 +28,17 @@ def recall_at_n(predictions: dict, ground_truth: dict, n=10):
     - Items with no ground truth related items are skipped in the calculation.
     - If none of the items have ground truth, the function will raise a ZeroDivisionError.
     """
-    recalls = []
+    hits, totals = [], []
     for item_id, predicted in predictions.items():
-        true_related = ground_truth.get(item_id, set())
+        # Accept any iterable of IDs; a frozenset keeps membership tests O(1)
+        true_related = frozenset(ground_truth.get(item_id, ()))
         if not true_related:
             continue
         top_n = list(predicted)[:n]
-        hits = set(top_n) & true_related
-        recalls.append(len(hits) / len(true_related))
-    return sum(recalls) / len(recalls)
+        hits.append(len(true_related.intersection(top_n)))
+        totals.append(len(true_related))
+    recalls = np.asarray(hits, dtype=np.float64) / np.asarray(totals, dtype=np.float64)
+    return float(recalls.sum()) / len(recalls)
 
 def tndcg_at_n(predictions: dict, ground_truth: dict, n=10):
     """
@@ -48,7 +52,7 @@ def tndcg_at_n(predictions: dict, ground_truth: dict, n=10):
     predictions : dict
         A dictionary mapping item IDs to an ordered list (or iterable) of predicted related item IDs.
     ground_truth : dict
-        A dictionary mapping item IDs to a set of true related item IDs.
+        A dictionary mapping item IDs to a set (or any iterable) of true related item IDs.
     n : int, optional
         The number of top predictions to consider for each item (default is 10).
 
@@ -63,19 +67,109 @@ def tndcg_at_n(predictions: dict, ground_truth: dict, n=10):
     - The ideal DCG (IDCG) is computed by sorting the relevance scores for the top-n predictions in descending order.
     - If there are no relevant items in the top-n, NDCG is set to 0 for that item.
     """
-    def dcg(relevance_scores):
-        return sum(rel / np.log2(idx + 2) for idx, rel in enumerate(relevance_scores))
+    # Position discounts 1 / log2(rank + 1), and the ideal DCG of k relevant items at the top
+    discounts = 1.0 / np.log2(np.arange(2, n + 2))
+    ideal_dcgs = np.cumsum(discounts)
 
     ndcgs = []
     for dataset_id, predicted in predictions.items():
-        true_related = ground_truth.get(dataset_id, set())
+        true_related = frozenset(ground_truth.get(dataset_id, ()))
         if not true_related:
             continue
         top_n = list(predicted)[:n]
-        relevance_scores = [1 if pid in true_related else 0 for pid in top_n]
-        ideal_scores = sorted(relevance_scores, reverse=True)
-        dcg_val = dcg(relevance_scores)
-        idcg_val = dcg(ideal_scores)
-        ndcg = dcg_val / idcg_val if idcg_val > 0 else 0.0
-        ndcgs.append(ndcg)
-    return sum(ndcgs) / len(ndcgs)
\ No newline at end of file
+        relevance_scores = np.fromiter((pid in true_related for pid in top_n), dtype=np.float64, count=len(top_n))
+        num_relevant = int(relevance_scores.sum())
+        if num_relevant == 0:
+            ndcgs.append(0.0)
+            continue
+        dcg_val = relevance_scores @ discounts[:len(top_n)]
+        ndcgs.append(float(dcg_val / ideal_dcgs[num_relevant - 1]))
+    return sum(ndcgs) / len(ndcgs)
+
+def encode(predictions: dict, ground_truth: dict):
+    """
+    Encode string-keyed predictions and ground truth as int32 NumPy arrays.
+
+    Only items with non-empty ground truth are kept (they are the only ones the metrics
+    score), one row per item in the iteration order of `predictions`. Encoding once lets
+    `recall_at_n_encoded` and `tndcg_at_n_encoded` be evaluated for several n cheaply.
+
+    Parameters
+    ----------
+    predictions : dict
+        A dictionary mapping item IDs to an ordered list of predicted related item IDs,
+        assumed to contain no duplicates.
+    ground_truth : dict
+        A dictionary mapping item IDs to a set (or any iterable) of true related item IDs.
+
+    Returns
+    -------
+    pred_arr : np.ndarray
+        int32 array of shape (num_items, max_predictions); shorter rows are padded with -1.
+    gt_indptr : np.ndarray
+        int64 array of shape (num_items + 1,); row i's ground truth is
+        gt_indices[gt_indptr[i]:gt_indptr[i + 1]].
+    gt_indices : np.ndarray
+        int32 array holding each row's ground-truth IDs, sorted within the row.
+    id2int : dict
+        The mapping from item ID to its integer code.
+    """
+    id2int = {}
+    pred_rows, gt_rows = [], []
+    for item_id, predicted in predictions.items():
+        true_related = frozenset(ground_truth.get(item_id, ()))
+        if not true_related:
+            continue
+        pred_rows.append([id2int.setdefault(pid, len(id2int)) for pid in predicted])
+        gt_rows.append(sorted(id2int.setdefault(pid, len(id2int)) for pid in true_related))
+
+    width = max((len(row) for row in pred_rows), default=0)
+    pred_arr = np.full((len(pred_rows), width), -1, dtype=np.int32)
+    for i, row in enumerate(pred_rows):
+        pred_arr[i, :len(row)] = row
+
+    gt_indptr = np.zeros(len(gt_rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in gt_rows], out=gt_indptr[1:])
+    gt_indices = np.fromiter(chain.from_iterable(gt_rows), dtype=np.int32, count=int(gt_indptr[-1]))
+    return pred_arr, gt_indptr, gt_indices, id2int
+
+def _encoded_hits(pred_arr: np.ndarray, gt_indptr: np.ndarray, gt_indices: np.ndarray, n: int) -> np.ndarray:
+    """Boolean (num_items, n) mask of which top-n predictions are in the row's ground truth."""
+    preds = pred_arr[:, :n]
+    num_items = len(preds)
+    num_ids = int(max(preds.max(initial=-1), gt_indices.max(initial=-1))) + 1
+    # Offsetting every ID by row * num_ids turns the sorted per-row segments into a
+    # single sorted array, so one binary search answers all rows at once
+    rows = np.arange(num_items, dtype=np.int64)
+    gt_keys = np.repeat(rows, np.diff(gt_indptr)) * num_ids + gt_indices
+    pred_keys = rows[:, None] * num_ids + preds
+    pos = np.searchsorted(gt_keys, pred_keys)
+    found = gt_keys[np.minimum(pos, len(gt_keys) - 1)] == pred_keys if len(gt_keys) else np.zeros(preds.shape, dtype=bool)
+    return found & (preds >= 0)
+
+def recall_at_n_encoded(pred_arr: np.ndarray, gt_indptr: np.ndarray, gt_indices: np.ndarray, n=10):
+    """
+    Compute the average Recall@n on arrays produced by `encode`.
+
+    Equivalent to `recall_at_n` on the original dictionaries.
+    """
+    hits = _encoded_hits(pred_arr, gt_indptr, gt_indices, n).sum(axis=1)
+    recalls = hits / np.diff(gt_indptr)
+    return float(recalls.sum()) / len(recalls)
+
+def tndcg_at_n_encoded(pred_arr: np.ndarray, gt_indptr: np.ndarray, gt_indices: np.ndarray, n=10):
+    """
+    Compute the average truncated NDCG@n on arrays produced by `encode`.
+
+    Equivalent to `tndcg_at_n` on the original dictionaries.
+    """
+    discounts = 1.0 / np.log2(np.arange(2, n + 2))
+    ideal_dcgs = np.cumsum(discounts)
+
+    relevance = _encoded_hits(pred_arr, gt_indptr, gt_indices, n)
+    num_relevant = relevance.sum(axis=1)
+    dcgs = relevance @ discounts[:relevance.shape[1]]
+    ndcgs = np.zeros(len(relevance), dtype=np.float64)
+    scored = num_relevant > 0
+    ndcgs[scored] = dcgs[scored] / ideal_dcgs[num_relevant[scored] - 1]
+    return float(ndcgs.sum()) / len(ndcgs)
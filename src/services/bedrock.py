@@ -1,5 +1,7 @@
 import boto3
-import json
+import functools
+import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from dotenv import load_dotenv
 import os
@@ -19,8 +21,11 @@ MODEL_CONFIG = {
 }
 AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY")
 AWS_SECRET_KEY = os.getenv("AWS_SECRET_KEY")
+# Concurrent Bedrock requests issued by batch_enrich
+BATCH_MAX_WORKERS = 8
 
-# Bedrock client
+# Bedrock client, built once per model and reused (boto3 clients are thread-safe)
+@functools.lru_cache(maxsize=4)
 def get_bedrock_client_for_model(model_name: str):
     config = MODEL_CONFIG.get(model_name)
     if not config:
@@ -50,15 +55,8 @@ def test_bedrock_model_access(region: str):
     except Exception as e:
         print(f"\nFailed to query Bedrock in region {region}: {e}")
 
-# Prompt template
-def build_prompt(description, headline, keywords, field_of_science, encoding_formats, structure_summary):
-    """
-    Constructs the prompt string to send to the LLM.
-    """
-    encoding_line = f"Encoding format(s): {', '.join(encoding_formats)}\n" if encoding_formats else ""
-    structure_line = f"Structure Summary:\n{structure_summary}\n" if structure_summary else ""
-
-    return f"""You are given the following metadata about a dataset:
+# Prompt template, filled in by build_prompt
+_PROMPT_TEMPLATE = """You are given the following metadata about a dataset:
 
     Description:
     {description}
@@ -67,8 +65,8 @@ def build_prompt(description, headline, keywords, field_of_science, encoding_for
     {headline}
 
     {encoding_line}{structure_line}
-    Keywords: {', '.join(keywords)}
-    Scientific domain: {', '.join(field_of_science)}
+    Keywords: {keywords}
+    Scientific domain: {field_of_science}
 
     Write a short, well-structured paragraph that could serve as a public-facing abstract for this dataset in a scientific data catalog or registry. 
     The paragraph should be 100–200 words, in fluent academic English. It should explain:
@@ -82,6 +80,22 @@ def build_prompt(description, headline, keywords, field_of_science, encoding_for
     Do not assume the structure summary lists all records and their fields; it is based on a sample (i.e., up to 3 records and 5 fields each).
     """
 
+def build_prompt(description, headline, keywords, field_of_science, encoding_formats, structure_summary):
+    """
+    Constructs the prompt string to send to the LLM.
+    """
+    encoding_line = f"Encoding format(s): {', '.join(encoding_formats)}\n" if encoding_formats else ""
+    structure_line = f"Structure Summary:\n{structure_summary}\n" if structure_summary else ""
+
+    return _PROMPT_TEMPLATE.format(
+        description=description,
+        headline=headline,
+        encoding_line=encoding_line,
+        structure_line=structure_line,
+        keywords=", ".join(keywords),
+        field_of_science=", ".join(field_of_science),
+    )
+
 def call_bedrock(prompt: str, model_name: str) -> str:
     """
     Unified Bedrock call supporting Claude 3.5 Sonnet and Mistral.
@@ -111,12 +125,12 @@ def call_bedrock(prompt: str, model_name: str) -> str:
 
     response = client.invoke_model(
         modelId=model_id,
-        body=json.dumps(body),
+        body=orjson.dumps(body),
         contentType="application/json",
         accept="application/json"
     )
 
-    output = json.loads(response["body"].read())
+    output = orjson.loads(response["body"].read())
 
     # Parse model output
     if model_id == "anthropic.claude-3-5-sonnet-20240620-v1:0":
@@ -129,8 +143,7 @@ def enrich_dataset_from_json(json_path: Path, llm="mistral"):
     Reads a JSON dataset metadata file, constructs a prompt, 
     calls Bedrock to enrich it, and returns the result.
     """
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = orjson.loads(Path(json_path).read_bytes())
 
     description = data.get("description", "")
     headline = data.get("headline", "")
@@ -151,7 +164,7 @@ def enrich_dataset_from_json(json_path: Path, llm="mistral"):
         f"'{record.get('name', '')}' with fields: {', '.join(f.get('name', '') for f in record.get('field', [])[:5] if f.get('name'))}"
         for record in record_sets[:3]
         if record.get("name") and record.get("field")
-    ]
+    ] if record_sets else []
 
     structure_summary = (
         "The dataset contains the following records:\n" +
@@ -168,21 +181,27 @@ def enrich_dataset_from_json(json_path: Path, llm="mistral"):
     }
     # return prompt
 
-def batch_enrich(json_folder: str, output_file: str, llm="mistral"):
+def batch_enrich(json_folder: str, output_file: str, llm="mistral", max_workers: int = BATCH_MAX_WORKERS):
     input_paths = list(Path(json_folder).glob("*.json"))
-    results = []
 
-    for path in input_paths:
+    def enrich(path):
         print(f"Processing {path.name}...")
         try:
-            result = enrich_dataset_from_json(path, llm=llm)
-            results.append(result)
+            return enrich_dataset_from_json(path, llm=llm)
         except Exception as e:
             print(f"Failed for {path.name}: {e}")
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        for item in results:
-            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            return None
+
+    # Bedrock calls are network-bound, so threads overlap them. Results are written
+    # by this thread alone as they complete, so finished work survives a crash.
+    # orjson emits UTF-8 bytes directly, non-ASCII characters unescaped
+    with open(output_file, "wb") as f, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(enrich, path) for path in input_paths]
+        for future in as_completed(futures):
+            result = future.result()
+            if result is not None:
+                f.write(orjson.dumps(result) + b"\n")
+                f.flush()
 
 if __name__ == "__main__":
     test_bedrock_model_access("eu-central-1")
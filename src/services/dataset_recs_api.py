@@ -1,18 +1,43 @@
+import hashlib
 import logging
+import mmap
+import os
+import pickle
+import sys
 from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
-import json
+from starlette.datastructures import State
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+import ijson
+import numpy as np
+import orjson
 from pathlib import Path
 from pydantic import BaseModel, Field
+# OpenAPI examples, baked from api_docs/*.json by tools/gen_api_docs.py
+from src.services.api_docs._baked import EXAMPLES as examples_data, ERRORS as errors_data
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("dataset_recs_api")
 
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (defined here since FastAPI's own is deprecated in newer releases)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load once per process at startup and keep it on app.state for the handlers
+    load_recommendations(app.state)
+    yield
+
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     openapi_url="/dataset-recsys/openapi.json",
     docs_url="/dataset-recsys/docs",
     redoc_url="/dataset-recsys/redoc",
@@ -26,45 +51,140 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-DATA_DIR = Path("data")
-DOCS_VALID_EXAMPLES_PATH = Path("src/services/api_docs/valid_examples.json")
-DOCS_ERROR_EXAMPLES_PATH = Path("src/services/api_docs/error_examples.json")
+DATA_DIR = Path(os.getenv("DATASET_RECS_DATA_DIR", "data"))
+# Largest number of recommendations a request may ask for
+MAX_N = 20
+# Values of n whose response bodies are serialized up front at load time
+PRECOMPUTED_N = (1, 5, 10, 20)
+# Position of each precomputed n within an item's block of `precomputed_bodies`
+PRECOMPUTED_SLOTS = {n: slot for slot, n in enumerate(PRECOMPUTED_N)}
+
+def _recommendation_files() -> List[Path]:
+    """Return the *_recommendations.json files found in subdirectories of the data directory."""
+    files = []
+    # os.scandir's entries carry their type from the directory listing, saving a stat per entry
+    with os.scandir(DATA_DIR) as dataset_entries:
+        for dataset_entry in dataset_entries:
+            if not dataset_entry.is_dir():
+                continue
+            with os.scandir(dataset_entry.path) as file_entries:
+                files.extend(
+                    Path(file_entry.path)
+                    for file_entry in file_entries
+                    if file_entry.name.endswith("_recommendations.json") and file_entry.is_file()
+                )
+    return sorted(files)
+
+def _recommendations_cache_path(files: List[Path]) -> Path:
+    """Cache file for the parsed recommendations, keyed by the source files and their mtimes."""
+    signature = repr([(p.as_posix(), p.stat().st_mtime_ns) for p in files])
+    digest = hashlib.sha1(signature.encode("utf-8")).hexdigest()[:16]
+    return DATA_DIR / f".recs_cache_{digest}.pkl"
 
-def load_recommendations():
+def _freeze_recommendations(data: dict) -> dict:
+    """Intern dataset and item names and store recommendation lists as tuples."""
+    return {
+        sys.intern(dataset): {sys.intern(iid): tuple(recs) for iid, recs in dataset_recs.items()}
+        for dataset, dataset_recs in data.items()
+    }
+
+def _read_recommendations() -> dict:
     """
-    Load all recommendation JSON files from subdirectories of the data directory.
+    Read all recommendation JSON files from subdirectories of the data directory.
+
+    The merged result is pickled next to the data, so later starts (and every
+    uvicorn worker) skip JSON parsing until a source file changes.
     """
-    global recommendations_data
     recommendations_data = {}
     if not DATA_DIR.exists():
         logger.warning(f"Data directory '{DATA_DIR}' does not exist.")
-        return
-
-    for dataset_path in DATA_DIR.iterdir():
-        if dataset_path.is_dir():
-            for file_path in dataset_path.glob("*_recommendations.json"):
-                try:
-                    with file_path.open("r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    recommendations_data.setdefault(dataset_path.name, {}).update(data)
-                except Exception as e:
-                    logger.error(f"Failed to load {file_path}: {e}")
-    logger.info(f"Loaded datasets: {list(recommendations_data.keys())}")
+        return recommendations_data
 
-def load_json_file(path: Path) -> dict:
-    if not path.exists():
-        logger.warning(f"File '{path}' does not exist.")
-        return {}
+    files = _recommendation_files()
+    cache_path = _recommendations_cache_path(files)
     try:
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
+        # Unpickle straight from the page cache, shared by all workers, without a private copy of the file
+        with cache_path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            recommendations_data = _freeze_recommendations(pickle.loads(mm))
+        logger.info(f"Loaded datasets from cache {cache_path}: {list(recommendations_data.keys())}")
+        return recommendations_data
+    except FileNotFoundError:
+        pass
     except Exception as e:
-        logger.error(f"Failed to load file from {path}: {e}")
-        return {}
+        logger.warning(f"Ignoring unreadable cache {cache_path}: {e}")
+
+    complete = True
+    for file_path in files:
+        file_recs = {}
+        try:
+            # Stream (iid, recs) pairs as tuples rather than parsing the whole file into
+            # lists first (ijson picks its C backend if available)
+            with file_path.open("rb") as f:
+                for iid, recs in ijson.kvitems(f, ""):
+                    file_recs[sys.intern(iid)] = tuple(recs)
+        except Exception as e:
+            complete = False
+            logger.error(f"Failed to load {file_path}: {e}")
+            continue
+        # Only a fully parsed file reaches the served data
+        recommendations_data.setdefault(sys.intern(file_path.parent.name), {}).update(file_recs)
+    logger.info(f"Loaded datasets: {list(recommendations_data.keys())}")
+
+    # Only cache a complete load; write-then-rename so concurrent workers never see a partial file
+    if complete:
+        try:
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(pickle.dumps(recommendations_data, protocol=5))
+            os.replace(tmp_path, cache_path)
+            for stale_path in DATA_DIR.glob(".recs_cache_*.pkl"):
+                if stale_path != cache_path:
+                    stale_path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not write recommendations cache {cache_path}: {e}")
+    return recommendations_data
+
+def load_recommendations(state: State):
+    """
+    Load all recommendations into `state` (the app's state), indexed for the endpoint.
+
+    Every (dataset, iid) gets a dense integer id via `item_ids` (one hash probe per request).
+    Recommendations are packed CSR-style: item `id`'s are the uint32 codes
+    `rec_indices[rec_indptr[id]:rec_indptr[id + 1]]`, decoded through `rec_names`.
+    `precomputed_bodies[id * len(PRECOMPUTED_N) + PRECOMPUTED_SLOTS[n]]` holds its serialized response for n in PRECOMPUTED_N.
+    """
+    recommendations_data = _read_recommendations()
+    state.available_datasets = frozenset(recommendations_data)
+    state.item_ids = {}
+    rec_codes = {}
+    indptr, indices = [0], []
+    for dataset, dataset_recs in recommendations_data.items():
+        for iid, recs in dataset_recs.items():
+            state.item_ids[(dataset, iid)] = len(indptr) - 1
+            indices.extend(rec_codes.setdefault(rec, len(rec_codes)) for rec in recs)
+            indptr.append(len(indices))
+    state.rec_names = list(rec_codes)
+    state.rec_indptr = np.array(indptr, dtype=np.int64)
+    state.rec_indices = np.array(indices, dtype=np.uint32)
+
+    # item_ids iterates in id order, so each item's block lands at id * len(PRECOMPUTED_N)
+    state.precomputed_bodies = []
+    for (dataset, iid), item_id in state.item_ids.items():
+        recs = item_recommendations(state, item_id)
+        state.precomputed_bodies.extend(recommendations_response_body(dataset, iid, recs[:n]) for n in PRECOMPUTED_N)
+
+def item_recommendations(state: State, item_id: int, n: Optional[int] = None) -> Tuple[str, ...]:
+    """Decode the first n (all if None) recommendations of an item from the packed arrays."""
+    codes = state.rec_indices[state.rec_indptr[item_id]:state.rec_indptr[item_id + 1]][:n]
+    return tuple(map(state.rec_names.__getitem__, codes.tolist()))
+
+def recommendations_response_body(dataset: str, iid: str, recs: Tuple[str, ...]) -> bytes:
+    """Serialized ItemToItemRecsResponse for a known (dataset, iid) and its top-n recommendations."""
+    return orjson.dumps({
+        "dataset": dataset,
+        "iid": iid,
+        "recommendations": recs,
+    })
 
-load_recommendations()
-examples_data, errors_data = (load_json_file(DOCS_VALID_EXAMPLES_PATH), load_json_file(DOCS_ERROR_EXAMPLES_PATH))
 SUPPORTED_DATASETS = ["mathe"]  # Extend this list to support more datasets
 
 class ItemToItemRecsResponse(BaseModel):
@@ -78,7 +198,8 @@ class ItemToItemRecsResponse(BaseModel):
 
 @app.get(
     "/dataset-recsys/recommend",
-    response_model=ItemToItemRecsResponse,
+    # Handlers return prebuilt JSON; the model only documents the schema via `responses`
+    response_model=None,
     summary="Get recommendations",
     description="""
 Retrieve the top-N recommendations for a given item in a dataset.
@@ -90,6 +211,7 @@ The meaning of *item* varies by dataset:
     responses={
         200: {
             # "description": "Successful response examples for supported datasets",
+            "model": ItemToItemRecsResponse,
             "content": {
                 "application/json": {
                     "examples": examples_data
@@ -101,28 +223,33 @@ The meaning of *item* varies by dataset:
     }
 )
 def get_recommendations(
+    request: Request,
     dataset: str = Query(..., description="The dataset/application name", enum=SUPPORTED_DATASETS),
     iid: str = Query(..., description="The item identifier within the selected dataset"),
-    n: int = Query(10, le=20, description="Number of similar items to return")
+    n: int = Query(10, le=MAX_N, description="Number of similar items to return")
 ):
+    state = request.app.state
     try:
-        if dataset not in recommendations_data:
-            logger.warning(f"Dataset '{dataset}' not found")
-            raise HTTPException(status_code=404, detail=f"Dataset '{dataset}' not found")
-
         # TODO: Replace the following JSON-based lookup with a database query when transitioning to DB storage.
-        dataset_recs = recommendations_data[dataset]
-        if iid not in dataset_recs:
+        item_id = state.item_ids.get((dataset, iid))
+        if item_id is None:
+            # Only misses need to tell an unknown dataset from an unknown item
+            if dataset not in state.available_datasets:
+                logger.warning(f"Dataset '{dataset}' not found")
+                raise HTTPException(status_code=404, detail=f"Dataset '{dataset}' not found")
             logger.warning(f"Item ID '{iid}' not found in dataset '{dataset}'")
             raise HTTPException(status_code=404, detail=f"Item ID '{iid}' not found in dataset '{dataset}'")
 
-        recs = dataset_recs[iid][:n]
-        logger.info(f"Returning {len(recs)} recommendations for dataset={dataset}, iid={iid}")
-        return ItemToItemRecsResponse(
-            dataset=dataset,
-            iid=iid,
-            recommendations=recs
-        )
+        # Bodies are prebuilt for common n (serialized on demand otherwise), skipping model validation
+        slot = PRECOMPUTED_SLOTS.get(n)
+        if slot is not None:
+            body = state.precomputed_bodies[item_id * len(PRECOMPUTED_N) + slot]
+        else:
+            body = recommendations_response_body(dataset, iid, item_recommendations(state, item_id, n))
+        # Per-request success logging is debug-only; the guard skips building the message
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Returning {len(item_recommendations(state, item_id, n))} recommendations for dataset={dataset}, iid={iid}")
+        return Response(content=body, media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -135,9 +262,9 @@ def get_recommendations(
     description="Check if the recommender API is running and responsive.",
     tags=["Service Health"],
 )
-async def health_check():
+async def health_check(request: Request):
     try:
-        if not recommendations_data:
+        if not getattr(request.app.state, "available_datasets", None):
             raise HTTPException(status_code=500, detail="No recommendation data loaded")
         return {"status": "ok"}
     except Exception as e:
@@ -157,7 +284,7 @@ async def root():
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     logger.error(f"HTTPException: {exc.status_code} - {exc.detail} (path: {request.url.path})")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "errors": [
@@ -172,7 +299,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     logger.error(f"RequestValidationError: {exc.errors()} (path: {request.url.path})")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "errors": [
@@ -185,5 +312,6 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 # uvicorn src.services.dataset_recs_api:app --reload
+# uvicorn src.services.dataset_recs_api:app --loop uvloop --http httptools  (as in the Dockerfile)
 # http://127.0.0.1:8000/dataset-recsys/redoc
 # http://127.0.0.1:8000/dataset-recsys/docs
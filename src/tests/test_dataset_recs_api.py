@@ -1,10 +1,26 @@
 import json
 from pathlib import Path
 from fastapi.testclient import TestClient
+from src.services import dataset_recs_api
 from src.services.dataset_recs_api import app
 import pytest
 
-client = TestClient(app)
+# Small stand-in for the production recommendations, served by the API tests
+FIXTURE_RECOS = {
+    "1.pdf": ["2.pdf", "3.pdf", "4.pdf", "5.pdf", "6.pdf", "7.pdf"],
+    "2.pdf": ["1.pdf"],
+    "3.pdf": [],
+}
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """API client whose startup (lifespan) loads FIXTURE_RECOS as the 'mathe' dataset."""
+    dataset_dir = tmp_path / "mathe"
+    dataset_dir.mkdir()
+    (dataset_dir / "mathe_recommendations.json").write_text(json.dumps(FIXTURE_RECOS), encoding="utf-8")
+    monkeypatch.setattr(dataset_recs_api, "DATA_DIR", tmp_path)
+    with TestClient(app) as client:
+        yield client
 
 def get_available_datasets():
     """Return a list of available datasets for testing."""
@@ -18,51 +34,67 @@ def load_recos(dataset="mathe"):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-@pytest.mark.parametrize("dataset", get_available_datasets())
-def test_recos_structure(dataset):
+@pytest.fixture(scope="session", params=get_available_datasets())
+def recos(request):
+    """Recommendations of each available dataset, loaded once per test session."""
+    return load_recos(request.param)
+
+def test_recos_structure(recos):
     """Verify the structure of recommendations is a dict with string keys and list of strings as values."""
-    recos = load_recos(dataset)
     assert isinstance(recos, dict)
     for k, v in recos.items():
         assert isinstance(k, str)
         assert isinstance(v, list)
         assert all(isinstance(x, str) for x in v)
 
-@pytest.mark.parametrize("dataset", get_available_datasets())
-def test_recos_reference_consistency(dataset):
+def test_recos_reference_consistency(recos):
     """Ensure all recommended items exist as keys, maintaining internal consistency."""
-    recos = load_recos(dataset)
-    for _, v in recos.items():
-        for rec in v:
-            assert rec in recos, f"{rec} not found as key in recommendations."
+    all_recs = set().union(*recos.values())
+    missing = all_recs.difference(recos)
+    assert not missing, f"{sorted(missing)} not found as keys in recommendations."
 
-@pytest.mark.parametrize("dataset", get_available_datasets())
-def test_recos_no_self_recommendations(dataset):
+def test_recos_no_self_recommendations(recos):
     """Check that no item recommends itself."""
-    recos = load_recos(dataset)
     for k, v in recos.items():
         assert k not in v, f"{k} recommends itself."
 
-# @pytest.mark.parametrize("dataset", get_available_datasets())
-# def test_get_valid_recommendations(dataset):
-#     """Test API returns valid recommendations for a known item id."""
-#     recos = load_recos(dataset)
-#     valid_id = next(iter(recos.keys()))
-#     response = client.get(f"/recommendations?dataset={dataset}&iid={valid_id}&n=5")
-#     assert response.status_code == 200
-#     data = response.json()
-#     assert "recommendations" in data
-#     assert len(data["recommendations"]) <= 5
+def test_baked_api_docs_match_json():
+    """Ensure the baked OpenAPI examples are regenerated (tools/gen_api_docs.py) after editing the JSON."""
+    from src.services.api_docs._baked import EXAMPLES, ERRORS
+    api_docs = Path("src/services/api_docs")
+    assert EXAMPLES == json.loads((api_docs / "valid_examples.json").read_text(encoding="utf-8"))
+    assert ERRORS == json.loads((api_docs / "error_examples.json").read_text(encoding="utf-8"))
 
-@pytest.mark.parametrize("dataset", get_available_datasets())
-def test_get_invalid_id(dataset):
+def test_get_valid_recommendations(client):
+    """Test API returns valid recommendations for a known item id."""
+    valid_id = next(iter(FIXTURE_RECOS.keys()))
+    response = client.get(f"/dataset-recsys/recommend?dataset=mathe&iid={valid_id}&n=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert "recommendations" in data
+    assert data["recommendations"] == FIXTURE_RECOS[valid_id][:5]
+
+def test_get_invalid_id(client):
     """Verify API returns 404 for a non-existent item id."""
-    response = client.get(f"/recommendations?dataset={dataset}&iid=nonexistent.pdf")
+    response = client.get("/dataset-recsys/recommend?dataset=mathe&iid=nonexistent.pdf")
     assert response.status_code == 404
 
-def test_get_invalid_dataset():
+def test_get_invalid_dataset(client):
     """Verify API returns 404 for an unknown dataset."""
-    response = client.get("/recommendations?dataset=unknown&iid=6.pdf")
+    response = client.get("/dataset-recsys/recommend?dataset=unknown&iid=6.pdf")
     assert response.status_code == 404
 
-# python -m pytest -v
\ No newline at end of file
+def test_corrupt_file_is_not_served(tmp_path, monkeypatch):
+    """A recommendations file that fails to parse must not leave a partially loaded dataset."""
+    dataset_dir = tmp_path / "mathe"
+    dataset_dir.mkdir()
+    truncated = json.dumps(FIXTURE_RECOS)[:40]
+    (dataset_dir / "mathe_recommendations.json").write_text(truncated, encoding="utf-8")
+    monkeypatch.setattr(dataset_recs_api, "DATA_DIR", tmp_path)
+    with TestClient(app) as client:
+        response = client.get("/dataset-recsys/recommend?dataset=mathe&iid=1.pdf")
+        assert response.status_code == 404
+        assert response.json()["errors"][0]["detail"] == "Dataset 'mathe' not found"
+        assert client.get("/dataset-recsys/health").status_code == 500
+
+# python -m pytest -v
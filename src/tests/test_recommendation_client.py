@@ -0,0 +1,72 @@
+import asyncio
+import json
+import fakeredis
+import pytest
+from src import recommendation_client
+from src.recommendation_client import AsyncRecommendationClient, RecommendationClient
+
+@pytest.fixture
+def server():
+    """In-memory Redis server shared by the sync and async clients of a test."""
+    return fakeredis.FakeServer()
+
+@pytest.fixture
+def client(server, monkeypatch):
+    """RecommendationClient backed by an in-memory fakeredis server."""
+    fake = fakeredis.FakeRedis(server=server, decode_responses=True)
+    monkeypatch.setattr(recommendation_client, "get_connection_pool", lambda: fake.connection_pool)
+    return RecommendationClient()
+
+def ingest(client, tmp_path, recos, usecase="taxguides"):
+    path = tmp_path / f"{usecase}.json"
+    path.write_text(json.dumps(recos), encoding="utf-8")
+    return client.ingest_json(str(path), usecase=usecase)
+
+def test_ingest_and_query(client, tmp_path):
+    """Verify recommendations keep their order and the reverse index and PDF listing are populated."""
+    ingest(client, tmp_path, {"6.pdf": ["7.pdf", "9.pdf"], "22.pdf": ["7.pdf"], "65.pdf": []})
+    assert client.get_recommendations("taxguides", "6.pdf") == ["7.pdf", "9.pdf"]
+    assert client.get_top_n("taxguides", "6.pdf", 1) == ["7.pdf"]
+    assert client.get_recommendations("taxguides", "65.pdf") == []
+    assert client.find_entries_recommending("taxguides", "7.pdf") == {"6.pdf", "22.pdf"}
+    assert sorted(client.list_pdfs("taxguides")) == ["22.pdf", "6.pdf", "65.pdf"]
+    assert client.list_usecases() == ["taxguides"]
+    assert client.lookup_top_n("taxguides", "6.pdf", 5) == (True, ["7.pdf", "9.pdf"])
+    assert client.lookup_top_n("unknown", "6.pdf", 5) == (False, [])
+    assert client.lookup_top_n("taxguides", "6.pdf", 0) == (True, [])
+    assert client.lookup_top_n("unknown", "6.pdf", 0) == (False, [])
+
+def test_reingest_updates_reverse_index(client, tmp_path):
+    """Re-ingesting a PDF replaces its recommendations on both the forward and the reverse side."""
+    ingest(client, tmp_path, {"6.pdf": ["7.pdf", "9.pdf"], "65.pdf": ["7.pdf"]})
+    ingest(client, tmp_path, {"6.pdf": ["9.pdf"]})
+    assert client.get_recommendations("taxguides", "6.pdf") == ["9.pdf"]
+    assert client.find_entries_recommending("taxguides", "7.pdf") == {"65.pdf"}
+    assert client.find_entries_recommending("taxguides", "9.pdf") == {"6.pdf"}
+
+def test_duplicate_recommendation_keeps_first_rank(client, tmp_path):
+    """A PDF listed twice for the same entry stays at its first position."""
+    ingest(client, tmp_path, {"6.pdf": ["7.pdf", "9.pdf", "7.pdf", "8.pdf"]})
+    assert client.get_recommendations("taxguides", "6.pdf") == ["7.pdf", "9.pdf", "8.pdf"]
+
+def test_async_client_reads_ingested_data(client, server, tmp_path, monkeypatch):
+    """AsyncRecommendationClient sees what the sync client ingested, through the same key patterns."""
+    ingest(client, tmp_path, {"6.pdf": ["7.pdf", "9.pdf"], "22.pdf": ["7.pdf"]})
+    monkeypatch.setattr(
+        recommendation_client.redis.asyncio.Redis, "from_url",
+        lambda *args, **kwargs: fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+    )
+
+    async def queries():
+        async_client = AsyncRecommendationClient()
+        try:
+            assert await async_client.check_connection()
+            assert await async_client.lookup_top_n("taxguides", "6.pdf", 1) == (True, ["7.pdf"])
+            assert await async_client.lookup_top_n("taxguides", "6.pdf", 0) == (True, [])
+            assert await async_client.lookup_top_n("unknown", "6.pdf", 5) == (False, [])
+            assert await async_client.find_entries_recommending("taxguides", "7.pdf") == {"6.pdf", "22.pdf"}
+            assert await async_client.list_usecases() == ["taxguides"]
+        finally:
+            await async_client.aclose()
+
+    asyncio.run(queries())
@@ -0,0 +1,42 @@
+import random
+import numpy as np
+import pytest
+from src.recs_metrics import recall_at_n, tndcg_at_n, encode, recall_at_n_encoded, tndcg_at_n_encoded
+
+def make_inputs(seed, num_items=200, max_predictions=25, max_related=30):
+    """Random predictions of varying length (so encoded rows get padded) and ground truth, some of it empty."""
+    rng = random.Random(seed)
+    ids = [f"{k}.pdf" for k in range(num_items)]
+    predictions = {i: rng.sample(ids, rng.randint(0, max_predictions)) for i in ids}
+    ground_truth = {i: rng.sample(ids, rng.randint(0, max_related)) for i in ids}
+    return predictions, ground_truth
+
+def test_encode_layout():
+    """Check padding, CSR ground truth with sorted segments, and that items without ground truth are dropped."""
+    predictions = {"a": ["b", "c"], "b": ["a"], "c": ["a", "b"]}
+    ground_truth = {"a": {"c", "b"}, "b": set(), "c": ["b"]}
+    pred_arr, gt_indptr, gt_indices, id2int = encode(predictions, ground_truth)
+    assert pred_arr.dtype == np.int32 and gt_indices.dtype == np.int32
+    assert pred_arr.shape == (2, 2)
+    assert gt_indptr.tolist() == [0, 2, 3]
+    assert gt_indices[0:2].tolist() == sorted(gt_indices[0:2].tolist())
+    names = {code: name for name, code in id2int.items()}
+    assert [names[c] for c in pred_arr[1].tolist()] == ["a", "b"]
+    assert [names[c] for c in gt_indices[2:3].tolist()] == ["b"]
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("n", [1, 5, 10, 25, 40])
+def test_encoded_metrics_match_dict_metrics(seed, n):
+    """The encoded metrics must equal the dict-based ones, including for n larger than any prediction list."""
+    predictions, ground_truth = make_inputs(seed)
+    pred_arr, gt_indptr, gt_indices, _ = encode(predictions, ground_truth)
+    assert recall_at_n_encoded(pred_arr, gt_indptr, gt_indices, n) == pytest.approx(recall_at_n(predictions, ground_truth, n), abs=1e-12)
+    assert tndcg_at_n_encoded(pred_arr, gt_indptr, gt_indices, n) == pytest.approx(tndcg_at_n(predictions, ground_truth, n), abs=1e-12)
+
+def test_padding_is_not_a_hit():
+    """The -1 padding of a short row must never match ground truth of the previous row."""
+    predictions = {"a": ["x", "y", "z"], "b": []}
+    ground_truth = {"a": {"z"}, "b": {"z"}}
+    encoded = encode(predictions, ground_truth)[:3]
+    assert recall_at_n_encoded(*encoded, n=3) == recall_at_n(predictions, ground_truth, 3) == 0.5
+    assert tndcg_at_n_encoded(*encoded, n=3) == pytest.approx(tndcg_at_n(predictions, ground_truth, 3))
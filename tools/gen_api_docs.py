@@ -0,0 +1,45 @@
+"""
+Bake the API documentation examples into a Python module.
+
+The /recommend endpoint's OpenAPI examples live in src/services/api_docs/*.json.
+This script renders them as literals in src/services/api_docs/_baked.py, so the
+API imports them without any file I/O at startup. Rerun it after editing the JSON:
+
+    python tools/gen_api_docs.py
+"""
+from pathlib import Path
+
+import orjson
+
+API_DOCS_DIR = Path(__file__).resolve().parent.parent / "src" / "services" / "api_docs"
+BAKED = {
+    "EXAMPLES": API_DOCS_DIR / "valid_examples.json",
+    "ERRORS": API_DOCS_DIR / "error_examples.json",
+}
+OUTPUT_PATH = API_DOCS_DIR / "_baked.py"
+
+def to_literal(value, depth: int = 0) -> str:
+    """Render parsed JSON as an indented Python literal."""
+    indent = "    " * (depth + 1)
+    if isinstance(value, dict) and value:
+        items = "".join(f"{indent}{key!r}: {to_literal(item, depth + 1)},\n" for key, item in value.items())
+        return "{\n" + items + "    " * depth + "}"
+    if isinstance(value, list) and value:
+        items = "".join(f"{indent}{to_literal(item, depth + 1)},\n" for item in value)
+        return "[\n" + items + "    " * depth + "]"
+    return repr(value)
+
+def render() -> str:
+    lines = [
+        "# Generated by tools/gen_api_docs.py from the JSON files in this directory. Do not edit.",
+        "",
+    ]
+    for name, path in BAKED.items():
+        data = orjson.loads(path.read_bytes())
+        lines.append(f"{name} = {to_literal(data)}")
+        lines.append("")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    OUTPUT_PATH.write_text(render(), encoding="utf-8")
+    print(f"Wrote {OUTPUT_PATH}")